@@ -39,7 +39,15 @@ def main(use_mpi=False):
             help="""YAML
                             formatted file with input parameters.""",
         )
+        parser.add_argument(
+            "--nprocs",
+            type=int,
+            default=1,
+            help="""Number of processes to use on each node
+                            (default: 1)""",
+        )
         args = parser.parse_args()
+        nprocs = args.nprocs
 
         fs = open(args.input_file)
         infile = MuSpinInput(fs)
@@ -59,6 +67,14 @@ def main(use_mpi=False):
             "Launching MuSpinSim calculation " "from file: {0}".format(args.input_file)
         )
 
+        if nprocs > 1 and mpi.comm is not None:
+            # Forking processes after MPI has been initialised is not safe
+            logging.warning(
+                "WARNING: --nprocs is not supported together with MPI;"
+                " running with nprocs = 1"
+            )
+            nprocs = 1
+
         if is_fitting:
             logging.info(
                 "Performing fitting in variables: "
@@ -69,19 +85,21 @@ def main(use_mpi=False):
     else:
         infile = MuSpinInput()
         is_fitting = False
+        nprocs = 1
 
     is_fitting = mpi.broadcast(is_fitting)
+    nprocs = mpi.broadcast(nprocs)
 
     if not is_fitting:
         # No fitting
-        runner = ExperimentRunner(infile, {})
+        runner = ExperimentRunner(infile, {}, nprocs=nprocs)
         runner.run()
 
         if mpi.is_root:
             # Output
             runner.config.save_output()
     else:
-        fitter = FittingRunner(infile)
+        fitter = FittingRunner(infile, nprocs=nprocs)
         fitter.run()
 
         if mpi.is_root:
@@ -5,7 +5,6 @@ Collects methods to retrieve important physical constants
 
 import numpy as np
 from scipy import constants as cnst
-from soprano.nmr.utils import _get_isotope_data
 
 # Values taken from CODATA on 18/01/2021
 # Electron gyromagnetic ratio (MHz/T)
@@ -22,6 +21,17 @@ EFG_2_MHZ = (
 )
 
 
+def _isotope_data(elem, prop, iso=None):
+    # Soprano is slow to import, so it's only loaded once nuclear data is
+    # actually needed
+    from soprano.nmr.utils import _get_isotope_data
+
+    try:
+        return _get_isotope_data([elem], prop, isotope_list=[iso])[0]
+    except RuntimeError:
+        raise ValueError("Invalid isotope {0} for element {1}".format(iso, elem))
+
+
 def gyromagnetic_ratio(elem="mu", iso=None):
     """Return the gyromagnetic ratio of a given particle
 
@@ -42,10 +52,7 @@ def gyromagnetic_ratio(elem="mu", iso=None):
     elif elem == "mu":
         return MU_GAMMA
     else:
-        try:
-            val = _get_isotope_data([elem], "gamma", isotope_list=[iso])[0]
-        except RuntimeError:
-            raise ValueError("Invalid isotope {0} for element {1}".format(iso, elem))
+        val = _isotope_data(elem, "gamma", iso)
 
         return val / (2e6 * np.pi)
 
@@ -66,10 +73,7 @@ def quadrupole_moment(elem="mu", iso=None):
     if elem in ("e", "mu"):
         return 0
     else:
-        try:
-            val = _get_isotope_data([elem], "Q", isotope_list=[iso])[0]
-        except RuntimeError:
-            raise ValueError("Invalid isotope {0} for element {1}".format(iso, elem))
+        val = _isotope_data(elem, "Q", iso)
 
         return val
 
@@ -97,9 +101,6 @@ def spin(elem="mu", iso=None):
             raise ValueError("Invalid multiplicity " "{0} for electron".format(iso))
         return 0.5 * int(iso)
     else:
-        try:
-            val = _get_isotope_data([elem], "I", isotope_list=[iso])[0]
-        except RuntimeError:
-            raise ValueError("Invalid isotope {0} for element {1}".format(iso, elem))
+        val = _isotope_data(elem, "I", iso)
 
         return val
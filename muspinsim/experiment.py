@@ -3,6 +3,9 @@
 Classes and functions to perform actual experiments"""
 
 import logging
+from itertools import repeat
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
 import scipy.constants as cnst
 
@@ -11,17 +14,23 @@ from muspinsim.utils import get_xy
 from muspinsim.mpi import mpi_controller as mpi
 from muspinsim.simconfig import MuSpinConfig, ConfigSnapshot
 from muspinsim.input import MuSpinInput
-from muspinsim.spinop import DensityOperator, SpinOperator
+from muspinsim.spinop import DensityOperator, SpinOperator, _spinop_matrix, _kron
 from muspinsim.hamiltonian import Hamiltonian
 from muspinsim.lindbladian import Lindbladian
 
 
+def _run_configs(runner, cfgs):
+    # Helper for process pools: run a block of configurations with a copy
+    # of the ExperimentRunner and return the results tagged by their ID
+    return [(cfg.id,) + runner._run_snapshot(cfg) for cfg in cfgs]
+
+
 class ExperimentRunner(object):
     """A class meant to run experiments. Its main purpose as an object is to
     provide caching for any quantities that might not need to be recalculated
     between successive snapshots."""
 
-    def __init__(self, infile: MuSpinInput, variables: dict = {}):
+    def __init__(self, infile: MuSpinInput, variables: dict = {}, nprocs: int = 1):
         """Set up an experiment as defined by a MuSpinInput object
 
         Prepare a set of calculations (for multiple files and averages) as
@@ -33,6 +42,9 @@ class ExperimentRunner(object):
                                     calculations we need to perform.
             variables {dict} -- The values of any variables appearing in the input
                                 file
+            nprocs {int} -- Number of processes to use on each node to run
+                            the calculations (default: 1). Not to be used
+                            together with MPI
         """
 
         if mpi.is_root:
@@ -48,13 +60,11 @@ class ExperimentRunner(object):
 
         self._config = config
         self._system = config.system
-        # Store single spin operators
-        self._single_spinops = np.array(
-            [
-                [self._system.operator({i: a}).matrix for a in "xyz"]
-                for i in range(len(self._system))
-            ]
-        )
+        self._nprocs = max(int(nprocs), 1)
+
+        # Orientation and its rotation matrix
+        self._q = None
+        self._R = np.eye(3)
 
         # Parameters
         self._B = np.zeros(3)
@@ -68,6 +78,8 @@ class ExperimentRunner(object):
         self._rho0 = None
         self._Hz = None
         self._dops = None
+        self._Htot = None
+        self._p_operator = None
 
     @property
     def config(self):
@@ -77,6 +89,10 @@ class ExperimentRunner(object):
     def system(self):
         return self._system
 
+    @property
+    def nprocs(self):
+        return self._nprocs
+
     @property
     def B(self):
         return self._B
@@ -89,6 +105,7 @@ class ExperimentRunner(object):
             self._rho0 = None
             self._Hz = None
             self._dops = None
+            self._Htot = None
 
     @property
     def p(self):
@@ -100,6 +117,7 @@ class ExperimentRunner(object):
         if (x != self._p).any():
             self._p = x
             self._rho0 = None
+            self._p_operator = None
 
     @property
     def T(self):
@@ -111,6 +129,7 @@ class ExperimentRunner(object):
             self._T = x
             self._rho0 = None
             self._dops = None
+            self._Htot = None
 
     @property
     def rho0(self):
@@ -143,32 +162,28 @@ class ExperimentRunner(object):
                 I = self._system.I(i)
                 if i == mu_i:
                     r = DensityOperator.from_vectors(I, muon_axis, 0)
+                elif T == np.inf:
+                    # Fully decohered: no need to go through the Zeeman levels
+                    d = int(2 * I + 1)
+                    r = DensityOperator(np.eye(d) / d)
                 else:
                     # Get the Zeeman Hamiltonian for this field
-                    Hz = np.sum(
-                        [
-                            B[j] * SpinOperator.from_axes(I, e).matrix
-                            for j, e in enumerate("xyz")
-                        ],
-                        axis=0,
-                    )
+                    Hz = self._zeeman_matrix(I)
 
                     evals, evecs = np.linalg.eigh(Hz)
                     E = evals * 1e6 * self._system.gamma(i)
 
+                    # Energies are measured from the ground state, so that
+                    # the exponentials can not overflow at low temperature
+                    E -= np.amin(E)
+
                     if T > 0:
                         Z = np.exp(-cnst.h * E / (cnst.k * T))
                     else:
-                        Z = np.where(E == np.amin(E), 1.0, 0.0)
-                    if np.sum(Z) > 0:
-                        Z /= np.sum(Z)
-                    else:
-                        Z = np.ones(len(E)) / len(E)
+                        Z = np.where(E == 0, 1.0, 0.0)
+                    Z /= np.sum(Z)
 
-                    rhoI = np.sum(
-                        evecs[:, None, :] * evecs[None, :, :].conj() * Z[None, None, :],
-                        axis=-1,
-                    )
+                    rhoI = np.dot(evecs * Z[None, :], evecs.T.conj())
 
                     r = DensityOperator(rhoI)
 
@@ -180,17 +195,28 @@ class ExperimentRunner(object):
 
         return self._rho0
 
+    def _zeeman_matrix(self, I):
+        # B.S for a single spin of spin I, in its own space
+        B = self._B
+        return sum([B[j] * _spinop_matrix(I, e) for j, e in enumerate("xyz")])
+
     @property
     def Hz(self):
 
         if self._Hz is None:
-            B = self._B
-            g = self._system.gammas
-            Hz = np.sum(
-                B[None, :, None, None] * g[:, None, None, None] * self._single_spinops,
-                axis=(0, 1),
-            )
-            self._Hz = Hamiltonian(Hz, dim=self._system.dimension)
+            dim = self._system.dimension
+            D = int(np.prod(dim))
+            Hz = np.zeros((D, D), dtype=complex)
+
+            # Build each spin's Zeeman term in its own small space, then
+            # embed it in the full one with identities on all other spins
+            for i in range(len(self._system)):
+                h = self._system.gamma(i) * self._zeeman_matrix(self._system.I(i))
+                pre = int(np.prod(dim[:i]))
+                post = int(np.prod(dim[i + 1 :]))
+                Hz += _kron(_kron(np.eye(pre), h), np.eye(post))
+
+            self._Hz = Hamiltonian(Hz, dim=dim)
 
         return self._Hz
 
@@ -229,8 +255,9 @@ class ExperimentRunner(object):
             self._dops = []
             for i, a in self._config.dissipation_terms.items():
 
-                op_x = np.sum(self._single_spinops[i, :] * x[:, None, None], axis=0)
-                op_y = np.sum(self._single_spinops[i, :] * y[:, None, None], axis=0)
+                S = np.array([self._system.operator({i: e}).matrix for e in "xyz"])
+                op_x = np.sum(S * x[:, None, None], axis=0)
+                op_y = np.sum(S * y[:, None, None], axis=0)
                 op_p = SpinOperator(op_x + 1.0j * op_y, dim=self.system.dimension)
                 op_m = SpinOperator(op_x - 1.0j * op_y, dim=self.system.dimension)
 
@@ -249,34 +276,67 @@ class ExperimentRunner(object):
 
     @property
     def Htot(self):
-        # Build the total Hamiltonian
-        H = self.Hsys + self.Hz
 
-        # Do we have dissipation?
-        if len(self._config.dissipation_terms) > 0:
-            # Actually use a Lindbladian
-            H = Lindbladian.from_hamiltonian(H, self.dissipation_operators)
+        # Cached, so that snapshots sharing the same field and temperature
+        # can also reuse its diagonalisation
+        if self._Htot is None:
+            # Build the total Hamiltonian
+            H = self.Hsys + self.Hz
 
-        return H
+            # Do we have dissipation?
+            if len(self._config.dissipation_terms) > 0:
+                # Actually use a Lindbladian
+                H = Lindbladian.from_hamiltonian(H, self.dissipation_operators)
+
+            self._Htot = H
+
+        return self._Htot
 
     @property
     def p_operator(self):
-        return self._system.muon_operator(self.p)
+        if self._p_operator is None:
+            self._p_operator = self._system.muon_operator(self.p)
+
+        return self._p_operator
 
-    def run(self):
+    def run(self, executor=None):
         """Run the experiment
 
         Run all calculations in the configuration set, gather the results and
         return them.
 
+        Keyword Arguments:
+            executor {ProcessPoolExecutor} -- A pool of nprocs processes to
+                                              use, if nprocs > 1. If None, a
+                                              new one is created for this run
+                                              (default: None)
+
         Returns:
             results (np.ndarray) -- An array of results, gathered on the root
                                     node.
         """
 
-        for cfg in self._config[mpi.rank :: mpi.size]:
-            dataslice = self.run_single(cfg)
-            self._config.store_time_slice(cfg.id, dataslice)
+        # Each node takes a contiguous block of configurations: successive
+        # snapshots tend to share field, polarization and temperature, which
+        # lets the cached quantities be reused as much as possible
+        block = mpi.split_1D(range(len(self._config)))[mpi.rank]
+        cfgs = self._config[block.start : block.stop]
+
+        if self._nprocs > 1 and len(cfgs) > 1:
+            # Same idea within the node, one block per process
+            cfg_blocks = mpi.split_1D(cfgs, self._nprocs)
+            pool = executor or ProcessPoolExecutor(max_workers=self._nprocs)
+            try:
+                for results in pool.map(_run_configs, repeat(self), cfg_blocks):
+                    for cfg_id, dataslice, w in results:
+                        self._config.store_time_slice(cfg_id, dataslice, w)
+            finally:
+                if executor is None:
+                    pool.shutdown()
+        else:
+            for cfg in cfgs:
+                dataslice, w = self._run_snapshot(cfg)
+                self._config.store_time_slice(cfg.id, dataslice, w)
 
         self._config.results = mpi.sum_data(self._config.results)
 
@@ -302,9 +362,14 @@ class ExperimentRunner(object):
         T = cfg_snap.T  # Temperature
         q, w = cfg_snap.orient  # Quaternion and Weight for orientation
 
-        # Let's start by rotating things
-        self.B = q.rotate(B)
-        self.p = q.rotate(p)
+        # Let's start by rotating things. Successive snapshots often share
+        # the same orientation, so the rotation matrix is only rebuilt when
+        # it changes, and then applied to both vectors at once
+        if q is not self._q:
+            self._q = q
+            self._R = q.rotation_matrix()
+
+        self.B, self.p = np.dot(self._R, np.array([B, p]).T).T
         self.T = T
 
         return w
@@ -324,6 +389,13 @@ class ExperimentRunner(object):
                                    required results, or a single value.
         """
 
+        data, w = self._run_snapshot(cfg_snap)
+
+        return data * w
+
+    def _run_snapshot(self, cfg_snap: ConfigSnapshot):
+        # Run a snapshot, returning its data and weight separately, so that
+        # the weight can be applied when the data is accumulated
         w = self.load_config(cfg_snap)
 
         # Measurement operator?
@@ -336,4 +408,4 @@ class ExperimentRunner(object):
         elif cfg_snap.y == "integral":
             data = H.integrate_decaying(self.rho0, MU_TAU, operators=[S])[0] / MU_TAU
 
-        return np.real(data) * w
+        return np.real(data), w
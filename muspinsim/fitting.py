@@ -4,6 +4,7 @@ A class that takes care of runs where the goal is to fit some given data"""
 
 import os
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor
 from scipy.optimize import minimize
 
 from muspinsim.input import MuSpinInput
@@ -13,7 +14,7 @@ from muspinsim.mpi import mpi_controller as mpi
 
 
 class FittingRunner(object):
-    def __init__(self, inpfile: MuSpinInput):
+    def __init__(self, inpfile: MuSpinInput, nprocs: int = 1):
         """Initialise a FittingRunner object
 
         Initialise an object to run a parallelised fitting calculation.
@@ -23,11 +24,16 @@ class FittingRunner(object):
 
         Arguments:
             inpfile {MuSpinInput} -- Input file contents
+            nprocs {int} -- Number of processes to use on each node to run
+                            the calculations (default: 1). Not to be used
+                            together with MPI
 
         """
 
         self._input = inpfile
+        self._nprocs = max(int(nprocs), 1)
         self._runner = None
+        self._executor = None
 
         # Identify variables
         self._fitinfo = inpfile.fitting_info
@@ -68,13 +74,22 @@ class FittingRunner(object):
                 self._fitinfo["method"].lower()
             ]
 
-            self._sol = minimize(
-                self._targfun,
-                self._x,
-                method=method,
-                tol=self._fitinfo["rtol"],
-                bounds=self._xbounds,
-            )
+            # The same pool of processes is used for the whole fit
+            if self._nprocs > 1:
+                self._executor = ProcessPoolExecutor(max_workers=self._nprocs)
+
+            try:
+                self._sol = minimize(
+                    self._targfun,
+                    self._x,
+                    method=method,
+                    tol=self._fitinfo["rtol"],
+                    bounds=self._xbounds,
+                )
+            finally:
+                if self._executor is not None:
+                    self._executor.shutdown()
+                    self._executor = None
 
             self._done = True
             mpi.broadcast_object(self, ["_x", "_done"])
@@ -102,8 +117,10 @@ class FittingRunner(object):
             return
 
         vardict = dict(zip(self._xnames, self._x))
-        self._runner = ExperimentRunner(self._input, variables=vardict)
-        y = self._runner.run()
+        self._runner = ExperimentRunner(
+            self._input, variables=vardict, nprocs=self._nprocs
+        )
+        y = self._runner.run(executor=self._executor)
 
         if mpi.is_root:
             # Compare with target data
@@ -82,14 +82,19 @@ class Hamiltonian(Operator, Hermitian):
 
         # Matrix of evolution operators
         ll = -2.0j * np.pi * (evals[:, None] - evals[None, :])
-        rho = np.exp(ll[None, :, :] * times[:, None, None]) * rho0[None, :, :]
+        evol = np.exp(ll[None, :, :] * times[:, None, None])
 
         # Now, return values
         if len(operators) > 0:
-            # Actually compute expectation values
-            result = np.sum(rho[:, None, :, :] * operatorsT[None, :, :, :], axis=(2, 3))
+            # Actually compute expectation values. The initial state is folded
+            # into the operators, so that all times and operators are
+            # contracted in a single matrix product
+            n = len(evals)
+            rhoops = (rho0[None, :, :] * operatorsT).reshape((-1, n * n))
+            result = np.dot(evol.reshape((-1, n * n)), rhoops.T)
         else:
             # Just return density matrices
+            rho = evol * rho0[None, :, :]
             sceve = evecs.T.conj()
             result = [DensityOperator(r, dim).basis_change(sceve) for r in rho]
 
@@ -146,6 +151,6 @@ class Hamiltonian(Operator, Hermitian):
             [(-o.basis_change(evecs).matrix / (ll - 1.0 / tau)).T for o in operators]
         )
 
-        result = np.sum(rho0[None, :, :] * intops[:, :, :], axis=(1, 2))
+        result = np.einsum("ij,oij->o", rho0, intops)
 
         return result
@@ -7,6 +7,7 @@ import re
 from io import StringIO
 
 import numpy as np
+from functools import lru_cache
 from collections import namedtuple
 
 from muspinsim.input.keyword import (
@@ -45,6 +46,17 @@ y_axis
 }
 
 
+@lru_cache(maxsize=len(InputKeywords))
+def _keyword_default(name):
+    # Default values do not depend on variables, so each only needs to be
+    # evaluated once. Read-only, since the same array is returned every time
+    kw = InputKeywords[name]()
+    val = np.asarray(kw.evaluate())
+    val.flags.writeable = False
+
+    return kw.arguments, val
+
+
 class MuSpinInput(object):
     def __init__(self, fs=None):
         """Read in an input file
@@ -131,9 +143,9 @@ class MuSpinInput(object):
                     )
 
                 if issubclass(KWClass, MuSpinEvaluateKeyword):
-                    kw = KWClass(block, args=args, variables=self._variables)
+                    kw = KWClass.get(block, args=args, variables=self._variables)
                 else:
-                    kw = KWClass(block, args=args)
+                    kw = KWClass.get(block, args=args)
 
                 kwid = kw.id
 
@@ -175,10 +187,9 @@ class MuSpinInput(object):
                     result[name] = MuSpinInputValue(name, kw.arguments, val)
 
                 elif KWClass.default is not None:
-                    kw = KWClass()
-                    val = np.array(kw.evaluate())
+                    args, val = _keyword_default(name)
 
-                    result[name] = MuSpinInputValue(name, kw.arguments, val)
+                    result[name] = MuSpinInputValue(name, {**args}, val)
 
         return result
 
@@ -201,7 +212,7 @@ class MuSpinInput(object):
         try:
             block = raw_blocks.pop("fitting_data")
             kw = InputKeywords["fitting_data"](block)
-            self._fitting_info["data"] = np.array(kw.evaluate())
+            self._fitting_info["data"] = kw.evaluate()
         except KeyError:
             raise MuSpinInputError(
                 "Fitting variables defined without defining" " a set of data to fit"
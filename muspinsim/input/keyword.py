@@ -7,9 +7,15 @@ import re
 import sys
 import inspect
 import numpy as np
+from functools import lru_cache
 
 from muspinsim.constants import MU_GAMMA
-from muspinsim.input.larkeval import LarkExpression, lark_tokenize
+from muspinsim.input.larkeval import (
+    LarkExpression,
+    lark_expression,
+    lark_tokenize,
+    LarkExpressionError,
+)
 from muspinsim.input.variables import FittingVariable
 from muspinsim.utils import deepmap, zcw_gen, eulrange_gen
 
@@ -32,11 +38,45 @@ _math_constants = {"pi": np.pi, "deg": np.pi / 180.0, "e": np.exp(1), "inf": np.
 
 _phys_constants = {"muon_gyr": MU_GAMMA, "MHz": 1.0 / (2 * MU_GAMMA)}
 
+
+def _readonly(a):
+    a = np.array(a)
+    a.flags.writeable = False
+    return a
+
+
+# Polarization directions. These are returned as they are by expressions
+# using them, so they're made read-only
+_pol_constants = {
+    "longitudinal": _readonly([0, 0, 1.0]),
+    "transverse": _readonly([1.0, 0, 0]),
+}
+
 # Functions for powder orientation
 
 _pwd_functions = {"zcw": zcw_gen, "eulrange": eulrange_gen}
 
 
+# Enough for all the keywords of a few input files, without holding on to
+# every keyword ever created
+@lru_cache(maxsize=64)
+def _cached_keyword(KWClass, block, args, **kwargs):
+    return KWClass(list(block), list(args), **kwargs)
+
+
+# Plain numbers, as accepted by the grammar (float() accepts more, e.g. nan)
+_number_re = re.compile(r"-?([0-9]+(\.[0-9]*)?|\.[0-9]+)([eE][-+]?[0-9]+)?")
+
+
+def _numeric_line(line):
+    # Read a line of plain numbers without the parser, or return None if
+    # it's not one
+    tokens = line.split()
+    if not all(_number_re.fullmatch(tk) for tk in tokens):
+        return None
+    return [float(tk) for tk in tokens]
+
+
 # Expansion functions
 def _range(x1, x2, n=100):
     return np.linspace(x1, x2, int(n))[:, None]
@@ -92,6 +132,22 @@ class MuSpinKeyword(object):
 
         self._validate_values()
 
+    @classmethod
+    def get(cls, block=[], args=[]):
+        """Return an instance of this keyword, reusing an identical one if it
+        was already created. Keywords are never modified after creation, so
+        sharing them is safe.
+
+        Arguments:
+            block {[str]} -- Lines of text defining the value of the keyword
+            args {[any]} -- Any arguments appearing after the keyword
+
+        Returns:
+            keyword {MuSpinKeyword} -- The keyword
+        """
+
+        return _cached_keyword(cls, tuple(block), tuple(args))
+
     def _default_args(self):
         # Dummy function, used for type signature and processing of arguments
         return {}
@@ -153,6 +209,8 @@ class MuSpinEvaluateKeyword(MuSpinKeyword):
     name = "evaluate_keyword"
     _functions = {**_math_functions}
     _constants = {**_math_constants}
+    # Whether identical expressions can be shared with other keywords
+    _reuse_expressions = True
 
     def __init__(self, block=[], args=[], variables=[]):
 
@@ -171,30 +229,90 @@ class MuSpinEvaluateKeyword(MuSpinKeyword):
         self._variables = list(cnames.union(vnames))
         super(MuSpinEvaluateKeyword, self).__init__(block, args)
 
+    @classmethod
+    def get(cls, block=[], args=[], variables=[]):
+        """Return an instance of this keyword, reusing an identical one if it
+        was already created. Keywords are never modified after creation, so
+        sharing them is safe.
+
+        Arguments:
+            block {[str]} -- Lines of text defining the value of the keyword
+            args {[any]} -- Any arguments appearing after the keyword
+            variables {[str]} -- Names of acceptable variables
+
+        Returns:
+            keyword {MuSpinEvaluateKeyword} -- The keyword
+        """
+
+        if not cls._reuse_expressions:
+            return cls(block, args, variables=variables)
+
+        return _cached_keyword(
+            cls, tuple(block), tuple(args), variables=tuple(sorted(variables))
+        )
+
     def _store_values(self, block):
+        # Constants are substituted right away in the expressions
+        make_expr = lark_expression if self._reuse_expressions else LarkExpression
         self._values = []
         for v in block:
-            b = [
-                [
-                    LarkExpression(
-                        tk, variables=self._variables, functions=self._functions
-                    )
-                    for tk in lark_tokenize(l)
-                ]
-                for l in v
-            ]
+            b = []
+            for l in v:
+                # Purely numeric lines are stored directly as floats
+                nums = _numeric_line(l)
+                if nums is None:
+                    nums = [
+                        make_expr(
+                            tk,
+                            variables=self._variables,
+                            functions=self._functions,
+                            constants=self._constants,
+                        )
+                        for tk in lark_tokenize(l)
+                    ]
+                b.append(nums)
             if len(b) == 1:
                 b = b[0]
             self._values.append(b)
 
+        # Variables needed by any of the expressions
+        self._needed_variables = set()
+
+        def add_variables(expr):
+            if isinstance(expr, LarkExpression):
+                self._needed_variables.update(expr.variables)
+
+        deepmap(add_variables, self._values)
+
+    def _check_variables(self, variables):
+        # Check the variables once for all expressions, so they can be
+        # evaluated without repeating the same checks
+        vset = set(variables.keys())
+        if len(self._needed_variables - vset) > 0:
+            raise LarkExpressionError(
+                "Some necessary variables have not been "
+                "defined when evaluating keyword {0}".format(self.name)
+            )
+        elif len(vset - set(self._variables)) > 0:
+            raise LarkExpressionError(
+                "Some invalid variables have been "
+                "defined when evaluating keyword {0}".format(self.name)
+            )
+
     def evaluate(self, **variables):
 
-        allvars = {**variables, **self._constants}
+        self._check_variables(variables)
 
-        def expreval(expr):
-            return expr.evaluate(**allvars)
+        return np.array(
+            deepmap(lambda expr: self._expreval(expr, variables), self._values)
+        )
 
-        return np.array(deepmap(expreval, self._values))
+    @staticmethod
+    def _expreval(expr, variables):
+        # Evaluate a stored value, once the variables have been checked
+        if isinstance(expr, LarkExpression):
+            return expr.evaluate_unchecked(variables)
+        return expr
 
 
 class MuSpinExpandKeyword(MuSpinEvaluateKeyword):
@@ -207,30 +325,37 @@ class MuSpinExpandKeyword(MuSpinEvaluateKeyword):
 
     def evaluate(self, **variables):
 
-        allvars = {**variables, **self._constants}
-
         if self.block_size != 1:
             raise RuntimeError("MuSpinExpandKeyword can not have block_size > 1")
 
-        def expreval(expr):
-            return expr.evaluate(**allvars)
+        self._check_variables(variables)
 
-        eval_values = []
+        # Each line is evaluated into a block of one or more rows
+        eval_blocks = []
         for line in self._values:
-            eval_line = np.array([expreval(expr) for expr in line])
+            eval_line = np.array([self._expreval(expr, variables) for expr in line])
 
             if len(line) == 1 and len(eval_line.shape) == 3:
-                eval_values += list(eval_line[0])
+                eval_blocks.append(eval_line[0])
             elif len(line) == 1 and len(eval_line.shape) == 2:
-                eval_values += [eval_line[0]]
+                eval_blocks.append(eval_line)
             elif len(eval_line.shape) == 1:
-                eval_values += [eval_line]
+                eval_blocks.append(eval_line[None, :])
             else:
                 raise RuntimeError(
                     "Unable to evaluate expression for " "keyword {0}".format(self.name)
                 )
 
-        return eval_values
+        if len(set([b.shape[1] for b in eval_blocks])) <= 1:
+            return np.concatenate(eval_blocks) if eval_blocks else np.empty((0, 0))
+
+        # Rows of different lengths can only be stored as objects
+        eval_values = [row for b in eval_blocks for row in b]
+        ans = np.empty(len(eval_values), dtype=object)
+        for i, row in enumerate(eval_values):
+            ans[i] = row
+
+        return ans
 
 
 class MuSpinCouplingKeyword(MuSpinEvaluateKeyword):
@@ -284,11 +409,7 @@ class KWPolarization(MuSpinExpandKeyword):
     name = "polarization"
     block_size = 1
     default = "transverse"
-    _constants = {
-        **_math_constants,
-        "longitudinal": np.array([0, 0, 1.0]),
-        "transverse": np.array([1.0, 0, 0]),
-    }
+    _constants = {**_math_constants, **_pol_constants}
     _functions = {**_math_functions}
 
 
@@ -353,6 +474,8 @@ class KWOrientation(MuSpinExpandKeyword):
     accept_range = True
     default = "0 0 0"
     _functions = {**_math_functions, **_pwd_functions}
+    # Powder grids can be large, and are only evaluated once per input anyway
+    _reuse_expressions = False
 
     def _default_args(self, mode="zyz"):
         args = {"mode": mode}
@@ -433,8 +556,6 @@ class KWFittingVariables(MuSpinKeyword):
 
     def _store_values(self, block):
 
-        variables = list(self._constants.keys())
-
         self._values = []
 
         for v in block:
@@ -445,10 +566,9 @@ class KWFittingVariables(MuSpinKeyword):
 
             if len(v) == 2:
                 b += [
-                    LarkExpression(tk, variables=variables)
+                    lark_expression(tk, constants=self._constants).evaluate()
                     for tk in lark_tokenize(v[1])
                 ]
-                b[1:] = [expr.evaluate(**self._constants) for expr in b[1:]]
 
             b = FittingVariable(*b)
 
@@ -464,6 +584,8 @@ class KWFittingData(MuSpinExpandKeyword):
     default = ""
     _constants = {}
     _functions = {"load": np.loadtxt}
+    # Files are read when the expression is created, and may have changed
+    _reuse_expressions = False
 
 
 class KWFittingMethod(MuSpinKeyword):
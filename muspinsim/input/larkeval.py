@@ -2,7 +2,11 @@
 
 Evaluation functions and classes based off the Lark grammar parser"""
 
-from lark import Lark
+import re
+import numpy as np
+from functools import lru_cache
+
+from lark import Lark, Tree
 from lark.exceptions import UnexpectedToken
 
 _expr_parser = Lark(
@@ -40,23 +44,43 @@ _expr_parser = Lark(
 )
 
 
+# String literals, as matched by the grammar
+_string_re = re.compile(r'"(?:\\.|[^"\\])*"')
+# Whitespace-separated chunks, keeping string literals (spaces and all) whole
+_chunk_re = re.compile(r'(?:"(?:\\.|[^"\\])*"|\S)+')
+# Chunks that start or end with an operator can't be complete expressions
+_incomplete_re = re.compile(r"^[+*/^),]|[-+*/^(,]$")
+
+
+def _maybe_complete(tk):
+    # Quick check of whether a chunk could be a complete expression, to only
+    # call the parser when it has a chance of succeeding. What's inside
+    # string literals doesn't count
+    tk = _string_re.sub('""', tk)
+    return tk.count("(") == tk.count(")") and _incomplete_re.search(tk) is None
+
+
 def lark_tokenize(line):
     """Splint a line of space-separated valid expressions."""
-    ls = line.split()
+    ls = _chunk_re.findall(line)
     tokens = []
-    while len(ls) > 0:
-        tk = ls.pop(0)
-        valid = False
-        while not valid:
-            try:
-                _expr_parser.parse(tk)
-                valid = True
-            except UnexpectedToken:
-                if len(ls) == 0:
-                    raise RuntimeError(
-                        "Line can not be tokenized into valid expressions"
-                    )
-                tk = tk + ls.pop(0)
+    i = 0
+    while i < len(ls):
+        tk = ls[i]
+        i += 1
+        # Merge chunks until they form a valid expression. The last one is
+        # always parsed, so that the right error gets reported
+        while True:
+            if _maybe_complete(tk) or i == len(ls):
+                try:
+                    _expr_parser.parse(tk)
+                    break
+                except UnexpectedToken:
+                    pass
+            if i == len(ls):
+                raise RuntimeError("Line can not be tokenized into valid expressions")
+            tk = tk + ls[i]
+            i += 1
         tokens.append(tk)
 
     return tokens
@@ -67,7 +91,20 @@ class LarkExpressionError(Exception):
 
 
 class LarkExpression(object):
-    def __init__(self, source, variables=[], functions={}):
+
+    # Many of these are created for a single input file
+    __slots__ = (
+        "_source",
+        "_tree",
+        "_variables",
+        "_functions",
+        "_all_variables",
+        "_function_bodies",
+        "_store_eval",
+        "_compiled",
+    )
+
+    def __init__(self, source, variables=[], functions={}, constants={}):
         """Create an expression to parse and evaluate with the Lark grammar
         parser. Variables and functions will be accepted only if included
         in the admissible ones.
@@ -79,6 +116,9 @@ class LarkExpression(object):
             variables {[str]} -- Names of acceptable variables
             functions {{str: callable}} -- Names and bodies of acceptable
                                            functions
+            constants {{str: any}} -- Names and values of acceptable
+                                      constants. These are substituted
+                                      when the expression is created
         """
 
         # Start by parsing the expression
@@ -91,9 +131,9 @@ class LarkExpression(object):
         # Find the variables and the function calls
         found_vars, found_funcs = self._analyse_tree(self._tree)
 
-        self._variables = set(found_vars)
+        self._variables = set(found_vars) - set(constants.keys())
         self._functions = set(found_funcs)
-        self._all_variables = set(variables)
+        self._all_variables = set(variables).union(constants.keys())
 
         # Check if they are valid
         if len(self._variables - self._all_variables) > 0:
@@ -104,6 +144,12 @@ class LarkExpression(object):
 
         self._function_bodies = {fn: functions[fn] for fn in self._functions}
 
+        # Evaluate once everything that does not depend on variables
+        self._tree, _ = self._fold_tree(self._tree, constants)
+
+        # Then compile what's left into a Python function
+        self._compile_tree()
+
         self._store_eval = None
         if len(self._variables) == 0:
             # No need to wait
@@ -112,30 +158,82 @@ class LarkExpression(object):
     def _analyse_tree(self, root):
         """Traverse the tree to look for variables and functions"""
 
-        found_vars = []
-        found_functions = []
+        found_vars = set()
+        found_functions = set()
 
-        if hasattr(root, "data"):
-            children = root.children
-            if root.data == "var":
-                found_vars = [root.children[0].value]
-            elif root.data == "fun":
-                found_functions = [root.children[0].value]
-                children = root.children[1:]  # Skip the NAME
+        for t in root.iter_subtrees():
+            if t.data == "var":
+                found_vars.add(t.children[0].value)
+            elif t.data == "fun":
+                found_functions.add(t.children[0].value)
+
+        return found_vars, found_functions
+
+    def _fold_tree(self, root, constants={}):
+        """Replace all subtrees that contain no variables with constant nodes
+        holding their value. Returns the new tree and whether it contains
+        any variables"""
+
+        if not hasattr(root, "data"):
+            return root, False
+        elif root.data == "var":
+            name = root.children[0].value
+            if name in constants:
+                return Tree("const", [constants[name]]), False
+            return root, True
+
+        folded = [self._fold_tree(c, constants) for c in root.children]
+        root = Tree(root.data, [c for c, _ in folded])
+
+        if any([has_vars for _, has_vars in folded]):
+            return root, True
         else:
-            return [], []
+            return Tree("const", [self._evaluate_tree(root)]), False
 
-        for c in children:
-            fv, ff = self._analyse_tree(c)
-            found_vars += fv
-            found_functions += ff
+    def _compile_tree(self):
+        """Compile the tree into a Python function of a dictionary of
+        variables, with no access to builtins"""
 
-        return found_vars, found_functions
+        consts = []
+
+        def tree_source(root):
+            d = root.data
+            if d == "const":
+                consts.append(root.children[0])
+                return "_c[{0}]".format(len(consts) - 1)
+            elif d == "var":
+                return "_v[{0!r}]".format(root.children[0].value)
+            elif d == "fun":
+                fname = root.children[0].value
+                args = ", ".join([tree_source(c) for c in root.children[1:]])
+                return "_f[{0!r}]({1})".format(fname, args)
+            elif d == "neg":
+                return "(-{0})".format(tree_source(root.children[0]))
+
+            op = {"add": "+", "sub": "-", "mul": "*", "div": "/", "pow": "**"}[d]
+            return "({0} {1} {2})".format(
+                tree_source(root.children[0]), op, tree_source(root.children[1])
+            )
+
+        source = "lambda _v: " + tree_source(self._tree)
+        namespace = {"__builtins__": {}, "_c": consts, "_f": self._function_bodies}
+        self._compiled = eval(compile(source, "<LarkExpression>", "eval"), namespace)
+
+    def __getstate__(self):
+        # The compiled function can't be pickled, it's rebuilt on loading
+        return {k: getattr(self, k) for k in self.__slots__ if k != "_compiled"}
+
+    def __setstate__(self, state):
+        for k, v in state.items():
+            setattr(self, k, v)
+        self._compile_tree()
 
     def _evaluate_tree(self, root, variables={}):
 
         if hasattr(root, "data"):
             d = root.data
+            if d == "const":
+                return root.children[0]
             evc = [self._evaluate_tree(c, variables) for c in root.children]
             if d == "add":
                 return evc[0] + evc[1]
@@ -191,7 +289,71 @@ class LarkExpression(object):
                 "defined when evaluating LarkExpression"
             )
 
+        return self.evaluate_unchecked(variables)
+
+    def evaluate_unchecked(self, variables):
+        """Evaluate the expression without checking the variables first. Only
+        meant for when the variables have already been checked.
+
+        Arguments:
+            variables {dict} -- Values of all the variables appearing in
+                                self.variables
+
+        Returns:
+            result {any} -- Result of evaluating the expression.
+        """
+
         if self._store_eval is not None:
             return self._store_eval
         else:
-            return self._evaluate_tree(self._tree, variables)
+            return self._compiled(variables)
+
+
+# Kept small, so that large values (e.g. orientation grids) are not held on
+# to for the whole life of the process
+@lru_cache(maxsize=256)
+def _cached_expression(source, variables, functions, constants):
+    expr = LarkExpression(source, variables, dict(functions), dict(constants))
+    # Stored values are returned to everyone sharing the expression, so
+    # arrays (e.g. from range or zcw) are made read-only
+    if isinstance(expr._store_eval, np.ndarray):
+        expr._store_eval.setflags(write=False)
+    return expr
+
+
+def lark_expression(source, variables=[], functions={}, constants={}):
+    """Create a LarkExpression, or reuse an identical one created before.
+
+    The same expressions tend to appear many times in an input file (and
+    across the inputs used for fitting), so they are parsed only once.
+    LarkExpressions are never modified after creation, and any array they
+    evaluate to in advance is made read-only, so sharing them is safe.
+
+    Arguments:
+        source {str} -- Source code of the expression
+
+    Keyword Arguments
+        variables {[str]} -- Names of acceptable variables
+        functions {{str: callable}} -- Names and bodies of acceptable
+                                       functions
+        constants {{str: any}} -- Names and values of acceptable constants.
+                                  Expressions using constants that can't be
+                                  hashed (e.g. arrays) are not reused
+
+    Returns:
+        expr {LarkExpression} -- The expression
+    """
+
+    args = (
+        source,
+        tuple(sorted(variables)),
+        tuple(sorted(functions.items())),
+        tuple(sorted(constants.items())),
+    )
+
+    try:
+        hash(args)
+    except TypeError:
+        return LarkExpression(source, variables, functions, constants)
+
+    return _cached_expression(*args)
@@ -307,7 +307,7 @@ class MuSpinConfig(object):
 
         return value
 
-    def store_time_slice(self, config_id, tslice):
+    def store_time_slice(self, config_id, tslice, weight=1.0):
         """Store a time slice of data in this configuration's results.
 
         Store a time slice of data, given the configuration snapshot ID, and
@@ -318,6 +318,10 @@ class MuSpinConfig(object):
             config_id {tuple} -- ID of the ConfigurationSnapshot with which
                                  the data was calculated
             tslice {np.ndarray} -- Time slice of data
+
+        Keyword Arguments:
+            weight {float} -- Weight of this time slice in the average
+                              (default: {1.0})
         """
 
         # Check the shape
@@ -328,7 +332,8 @@ class MuSpinConfig(object):
             tslice = np.average(tslice)
 
         ii = tuple(list(config_id[0]) + list(config_id[2]))
-        self._results[ii] += tslice / self._avg_N
+        # Weight and averaging are folded in a single scaling factor
+        self._results[ii] += tslice * (weight / self._avg_N)
 
     def save_output(self, name=None, path=".", extension=".dat"):
         """Save all output files for the gathered results
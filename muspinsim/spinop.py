@@ -4,6 +4,9 @@ Utility class to create and manipulate spin operators
 """
 
 import numpy as np
+from scipy import sparse
+from string import ascii_letters
+from functools import lru_cache, reduce
 from numbers import Number
 from muspinsim.utils import Clonable
 
@@ -12,30 +15,77 @@ def _mvals(I):
     return np.linspace(I, -I, int(2 * I + 1))
 
 
+def _Spcoeffs(mvals):
+    # Off-diagonal elements of the raising operator
+    return np.cumsum(2 * mvals)[:-1] ** 0.5
+
+
+def _offdiag(d, upper, lower):
+    # Complex d x d matrix with the given values just above and below the
+    # diagonal, filled in a single allocation
+    o = np.zeros((d, d), dtype=complex)
+    i = np.arange(d - 1)
+    o[i, i + 1] = upper
+    o[i + 1, i] = lower
+    return o
+
+
 def _Sp(mvals):
-    return 2 * np.diag(0.5 * (np.cumsum(2 * mvals)[:-1] ** 0.5), k=1) + 0.0j
+    return _offdiag(len(mvals), _Spcoeffs(mvals), 0)
 
 
 def _Sm(mvals):
-    return _Sp(mvals).T
+    return _offdiag(len(mvals), 0, _Spcoeffs(mvals))
 
 
 def _Sx(mvals):
-    o = _Sp(mvals)
-    return 0.5 * (o + o.T)
+    c = 0.5 * _Spcoeffs(mvals)
+    return _offdiag(len(mvals), c, c)
 
 
 def _Sy(mvals):
-    o = _Sp(mvals)
-    return 0.5j * (o.T - o)
+    c = 0.5j * _Spcoeffs(mvals)
+    return _offdiag(len(mvals), -c, c)
 
 
 def _Sz(mvals):
-    return np.diag(mvals) + 0.0j
+    return np.diag(np.asarray(mvals, dtype=complex))
 
 
 def _S0(mvals):
-    return np.eye(len(mvals)) + 0.0j
+    return np.eye(len(mvals), dtype=complex)
+
+
+@lru_cache(maxsize=None)
+def _spinop_matrix(I, axis):
+    # Single spin operator matrix, cached as these are rebuilt for every
+    # operator of a system. Read-only, since the same array is shared
+    o = {"x": _Sx, "y": _Sy, "z": _Sz, "+": _Sp, "-": _Sm, "0": _S0}[axis](_mvals(I))
+    o.flags.writeable = False
+    return o
+
+
+def _kron(A, B):
+    # Kronecker product of two matrices by broadcasting, skipping the
+    # generic machinery of np.kron
+    return (A[:, None, :, None] * B[None, :, None, :]).reshape(
+        (A.shape[0] * B.shape[0], A.shape[1] * B.shape[1])
+    )
+
+
+# Above this dimension, SpinOperator.from_axes builds its products as sparse
+# matrices: the single spin factors are mostly zeros, and skipping them
+# outweighs the overhead of scipy.sparse
+_SPARSE_KRON_DIM = 1024
+
+
+def _kron_reduce(matrices):
+    # Kronecker product of a list of matrices, reduced as a balanced tree
+    # so that large intermediate products are formed as few times as possible
+    n = len(matrices)
+    if n == 1:
+        return matrices[0]
+    return _kron(_kron_reduce(matrices[: n // 2]), _kron_reduce(matrices[n // 2 :]))
 
 
 class Hermitian(object):
@@ -58,7 +108,7 @@ class Hermitian(object):
 
         try:
             dd = self._diagdata
-            if np.all(dd["matrix"] == self._matrix):
+            if np.array_equal(dd["matrix"], self._matrix):
                 return dd["eigh"]
         except AttributeError:
             pass
@@ -94,7 +144,8 @@ class Operator(Clonable):
             ValueError -- Any of the passed values are invalid
         """
 
-        matrix = np.array(matrix) + 0.0j
+        # A copy is always made, already as complex
+        matrix = np.array(matrix, dtype=complex)
 
         if not (matrix.shape[0] == matrix.shape[1]):
             raise ValueError("Matrix passed to Operator must be square")
@@ -124,7 +175,10 @@ class Operator(Clonable):
 
     @property
     def matrix(self):
-        return np.array(self._matrix)
+        # A read-only view, to avoid copying the whole matrix at every access
+        m = self._matrix.view()
+        m.flags.writeable = False
+        return m
 
     @property
     def is_hermitian(self):
@@ -237,7 +291,7 @@ class Operator(Clonable):
         if self.dimension != x.dimension:
             return False
 
-        return np.all(self._matrix == x._matrix)
+        return np.array_equal(self._matrix, x._matrix)
 
     def kron(self, x):
         """Tensor product between this and another Operator
@@ -263,7 +317,7 @@ class Operator(Clonable):
         # Doing it this way saves some time
         ans = self.__class__.__new__(self.__class__)
         ans._dim = self._dim + x._dim
-        ans._matrix = np.kron(self._matrix, x._matrix)
+        ans._matrix = _kron(self._matrix, x._matrix)
 
         return ans
 
@@ -314,8 +368,10 @@ class Operator(Clonable):
             Operator -- Basis transformed version of this operator
         """
 
+        # With only three matrices the optimal order is trivial, so there's no
+        # need to go through multi_dot
         ans = self.clone()
-        ans._matrix = np.linalg.multi_dot([basis.T.conj(), ans._matrix, basis])
+        ans._matrix = np.dot(basis.T.conj(), np.dot(ans._matrix, basis))
 
         return ans
 
@@ -360,17 +416,14 @@ class SpinOperator(Operator):
             if not (axis in "xyz+-0"):
                 raise ValueError("{0} is not a valid spin axis".format(axis))
 
-            mvals = _mvals(I)
-
-            o = {"x": _Sx, "y": _Sy, "z": _Sz, "+": _Sp, "-": _Sm, "0": _S0}[axis](
-                mvals
-            )
-
-            matrices.append(o)
+            matrices.append(_spinop_matrix(I, axis))
 
-        M = matrices[0]
-        for m in matrices[1:]:
-            M = np.kron(M, m)
+        if np.prod(dim) > _SPARSE_KRON_DIM:
+            matrices = [sparse.csr_matrix(m) for m in matrices]
+            M = reduce(lambda A, B: sparse.kron(A, B, format="csr"), matrices)
+            M = M.toarray()
+        else:
+            M = _kron_reduce(matrices)
 
         return self(M, dim=dim)
 
@@ -452,6 +505,9 @@ class DensityOperator(Operator):
 
         dim = tuple(int(2 * I + 1) for I in Is)
         matrices = []
+        # Consecutive pure states (gamma = 0) are combined as state vectors,
+        # so that their full density matrix is only formed once
+        psi_tot = None
 
         for I, vec, gamma in zip(Is, vectors, gammas):
 
@@ -464,9 +520,7 @@ class DensityOperator(Operator):
             if gamma < 0 or gamma > 1:
                 raise ValueError("{0} is not a valid gamma value".format(gamma))
 
-            mvals = _mvals(I)
-
-            S = [_Sx(mvals), _Sy(mvals), _Sz(mvals)]
+            S = [_spinop_matrix(I, a) for a in "xyz"]
 
             o = sum([S[i] * vec[i] for i in range(3)])
 
@@ -474,14 +528,23 @@ class DensityOperator(Operator):
 
             psi = evecs[:, np.argmax(evals)]
 
+            if gamma == 0:
+                psi_tot = psi if psi_tot is None else np.kron(psi_tot, psi)
+                continue
+
+            if psi_tot is not None:
+                matrices.append(psi_tot[:, None] * psi_tot[None, :].conj())
+                psi_tot = None
+
             m = psi[:, None] * psi[None, :].conj()
             m *= (1 - gamma) * np.ones(m.shape) + gamma * np.eye(m.shape[0])
 
             matrices.append(m)
 
-        M = matrices[0]
-        for m in matrices[1:]:
-            M = np.kron(M, m)
+        if psi_tot is not None:
+            matrices.append(psi_tot[:, None] * psi_tot[None, :].conj())
+
+        M = _kron_reduce(matrices)
 
         return self(M, dim=dim)
 
@@ -508,15 +571,27 @@ class DensityOperator(Operator):
         """
 
         dim = list(self._dim)
-        tdim = list(sorted(tracedim))
-
-        m = self._matrix.reshape(dim + dim)
-
-        while len(tdim) > 0:
-            td = tdim.pop(-1)
-            # Trace along tdim
-            m = np.trace(m, axis1=td, axis2=td + len(dim))
-            dim.pop(td)  # Reduce dimension accordingly
+        n = len(dim)
+
+        # Build the subscripts for a single einsum contraction: each traced
+        # dimension uses the same index for rows and columns
+        rows = [ascii_letters[i] for i in range(n)]
+        cols = [
+            rows[i] if i in tracedim else ascii_letters[n + i] for i in range(n)
+        ]
+        keep = [i for i in range(n) if i not in tracedim]
+        subs = "{0}{1}->{2}{3}".format(
+            "".join(rows),
+            "".join(cols),
+            "".join([rows[i] for i in keep]),
+            "".join([cols[i] for i in keep]),
+        )
+
+        dim = [dim[i] for i in keep]
+        N = int(np.prod(dim))
+
+        m = np.einsum(subs, self._matrix.reshape(self._dim + self._dim))
+        m = m.reshape((N, N))
 
         return DensityOperator(m, dim)
 
@@ -546,13 +621,14 @@ class DensityOperator(Operator):
                 "SpinOperator and DensityOperator do not have" " compatible dimensions"
             )
 
-        return np.sum(operator.matrix * self.matrix.T)
+        return np.einsum("ij,ji->", operator._matrix, self._matrix)
 
 
 class SuperOperator(Operator):
     def __init__(self, matrix, dim=None):
 
-        matrix = np.array(matrix)
+        # No copy needed here, the Operator constructor makes one
+        matrix = np.asarray(matrix)
         n = matrix.shape[0] ** 0.5
 
         if int(n) != n:
@@ -718,4 +794,4 @@ class SuperOperator(Operator):
         if self.dimension != x.dimension:
             return False
 
-        return np.all(self._matrix == x._matrix)
+        return np.array_equal(self._matrix, x._matrix)
@@ -165,7 +165,6 @@ class SpinSystem(Clonable):
         gammas = []
         Qs = []
         Is = []
-        operators = []
 
         for s in spins:
             if isinstance(s, tuple):
@@ -177,18 +176,12 @@ class SpinSystem(Clonable):
             Qs.append(quadrupole_moment(el, iso))
             Is.append(spin(el, iso))
 
-            opdict = {a: SpinOperator.from_axes(Is[-1], a) for a in "xyz+-0"}
-
-            operators.append(opdict)
-
         self._spins = list(spins)
         self._gammas = np.array(gammas)
         self._Qs = np.array(Qs)
         self._Is = np.array(Is)
         self._dim = tuple((2 * self._Is + 1).astype(int))
 
-        self._operators = operators
-
         self._terms = []
         self._dissip_terms = []
 
@@ -537,14 +530,11 @@ class SpinSystem(Clonable):
             SpinOperator -- The requested operator
         """
 
-        ops = [self._operators[i][terms.get(i, "0")] for i in range(len(self))]
-
-        M = ops[0]
-
-        for i in range(1, len(ops)):
-            M = M.kron(ops[i])
+        # Built in a single pass from the single spin factors, rather than
+        # through a chain of intermediate Operators
+        axes = "".join([terms.get(i, "0") for i in range(len(self))])
 
-        return M
+        return SpinOperator.from_axes(self._Is, axes)
 
     def rotate(self, rotmat=np.eye(3)):
 
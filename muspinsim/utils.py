@@ -7,7 +7,6 @@ from collections.abc import Iterable
 
 import numpy as np
 from ase.quaternions import Quaternion
-from soprano.calculate.powder import ZCW
 
 
 class Clonable(object):
@@ -34,6 +33,9 @@ def deepmap(func, obj):
 
 
 def zcw_gen(N, mode="sphere"):
+    # Imported here as Soprano is slow to load
+    from soprano.calculate.powder import ZCW
+
     N = int(N)
     pwd = ZCW(mode)
     return pwd.get_orient_angles(N)[0]
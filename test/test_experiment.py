@@ -72,6 +72,21 @@ spins
         self.assertAlmostEqual(ertest.rho0.expectation(Sx_mu), 0.5)
         self.assertAlmostEqual(ertest.rho0.expectation(Sz_e), 0.0)
 
+        # Total Hamiltonian is cached until the field changes
+        Htot = ertest.Htot
+        self.assertIs(ertest.Htot, Htot)
+        ertest.p = [0, 0, 1.0]
+        self.assertIs(ertest.Htot, Htot)
+        ertest.B = [0, 0, 2.0]
+        self.assertIsNot(ertest.Htot, Htot)
+
+        # Polarization operator is cached until the polarization changes
+        Sz_mu = ertest.p_operator
+        self.assertTrue(Sz_mu == ertest._system.muon_operator([0, 0, 1.0]))
+        self.assertIs(ertest.p_operator, Sz_mu)
+        ertest.p = [1.0, 0, 0]
+        self.assertIsNot(ertest.p_operator, Sz_mu)
+
     def test_rho0(self):
 
         stest = StringIO(
@@ -114,6 +129,14 @@ spins
 
         self.assertTrue(np.all(np.isclose(np.diag(rho0.matrix), [Z[0], 0, Z[1], 0])))
 
+        # Very low temperature, would overflow without care
+        ertest.B = [0, 0, 1.0]
+        ertest.T = 1e-4
+
+        rho0 = ertest.rho0
+
+        self.assertTrue(np.all(np.isclose(np.diag(rho0.matrix), [1.0, 0, 0, 0])))
+
     def test_run(self):
 
         # Empty system
@@ -177,6 +200,29 @@ field
 
         self.assertAlmostEqual(results[0], 0.5 / (1.0 + 4 * np.pi ** 2 * tau ** 2))
 
+    def test_run_nprocs(self):
+
+        stest = StringIO(
+            """
+spins
+    mu e
+time
+    range(0, 1)
+orientation
+    zcw(10)
+hyperfine 1
+    10 2 0
+    2 10 0
+    0 0 10
+"""
+        )
+        itest = MuSpinInput(stest)
+
+        results = ExperimentRunner(itest).run()
+        results_par = ExperimentRunner(itest, nprocs=2).run()
+
+        self.assertTrue(np.all(np.isclose(results, results_par)))
+
     def test_dissipation(self):
 
         # Simple system
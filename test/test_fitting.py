@@ -59,3 +59,10 @@ dissipation 1
         sol = f1.run()
 
         self.assertAlmostEqual(sol.x[0], g, 3)
+
+        # Same with a pool of processes, shut down at the end of the fit
+        f2 = FittingRunner(i1, nprocs=2)
+        sol2 = f2.run()
+
+        self.assertAlmostEqual(sol2.x[0], sol.x[0])
+        self.assertIsNone(f2._executor)
@@ -45,6 +45,13 @@ class TestHamiltonian(unittest.TestCase):
 
         self.assertTrue(np.all(np.isclose(evol[:, 0], 0.5 * np.cos(2 * np.pi * t))))
 
+        # Multiple operators at once
+        evol = H.evolve(rho0, t, [ssys.operator({0: "z"}), ssys.operator({0: "y"})])
+
+        self.assertEqual(evol.shape, (100, 2))
+        self.assertTrue(np.all(np.isclose(evol[:, 0], 0.5 * np.cos(2 * np.pi * t))))
+        self.assertTrue(np.all(np.isclose(evol[:, 1], -0.5 * np.sin(2 * np.pi * t))))
+
     def test_integrate(self):
 
         ssys = SpinSystem(["e"])
@@ -1,9 +1,15 @@
+import pickle
 import unittest
 import numpy as np
 from io import StringIO
 from tempfile import NamedTemporaryFile
 
-from muspinsim.input.larkeval import LarkExpression, LarkExpressionError, lark_tokenize
+from muspinsim.input.larkeval import (
+    LarkExpression,
+    LarkExpressionError,
+    lark_tokenize,
+    lark_expression,
+)
 from muspinsim.input.keyword import (
     MuSpinKeyword,
     MuSpinEvaluateKeyword,
@@ -26,6 +32,8 @@ class TestInput(unittest.TestCase):
 
         self.assertEqual(e2.variables, {"x", "y"})
         self.assertEqual(e2.evaluate(x=2, y=5), 8)
+        self.assertEqual(e2.evaluate_unchecked({"x": 2, "y": 5}), 8)
+        self.assertEqual(pickle.loads(pickle.dumps(e2)).evaluate(x=2, y=5), 8)
 
         # Try using a function
         def double(x):
@@ -41,6 +49,43 @@ class TestInput(unittest.TestCase):
         e4 = LarkExpression("double(4)", functions={"double": double})
         self.assertEqual(e4._store_eval, 8)
 
+        # Constant parts are evaluated in advance
+        e8 = LarkExpression(
+            "x*(2+3)-sqrt(4)", variables="x", functions={"sqrt": np.sqrt}
+        )
+        self.assertEqual(e8._tree.children[0].children[1].data, "const")
+        self.assertEqual(e8._tree.children[1].data, "const")
+        self.assertEqual(e8.evaluate(x=2), 8)
+
+        # Constants are substituted right away
+        e9 = LarkExpression("2*x*MHz", variables="x", constants={"MHz": 3.0})
+        self.assertEqual(e9.variables, {"x"})
+        self.assertEqual(e9.evaluate(x=2), 12)
+        e9 = LarkExpression("2*MHz", constants={"MHz": 3.0})
+        self.assertEqual(e9._store_eval, 6)
+
+        # Identical expressions are only created once
+        e7 = lark_expression("x+y+1", variables="xy")
+        self.assertIs(lark_expression("x+y+1", variables="yx"), e7)
+        self.assertIsNot(lark_expression("x+y+1", variables="xyz"), e7)
+        self.assertEqual(e7.evaluate(x=2, y=3), 6)
+
+        # Shared arrays can't be modified
+        e10 = lark_expression("arange(3)", functions={"arange": np.arange})
+        with self.assertRaises(ValueError):
+            e10.evaluate()[0] = 1
+
+        # Errors in creating the expression are raised only once
+        calls = []
+
+        def bad(x):
+            calls.append(x)
+            raise TypeError()
+
+        with self.assertRaises(TypeError):
+            lark_expression("bad(1)", functions={"bad": bad})
+        self.assertEqual(len(calls), 1)
+
         # Errors
         with self.assertRaises(LarkExpressionError):
             e5 = LarkExpression("print(666)")
@@ -69,12 +114,21 @@ class TestInput(unittest.TestCase):
         self.assertAlmostEqual(lark_tokens[2].evaluate(x=np.pi / 2.0), 1.0)
         self.assertAlmostEqual(lark_tokens[3].evaluate(), np.arctan2(3.0, 4.0))
 
+        # Strings are kept whole, whatever they contain
+        tokens = lark_tokenize('load("my data.dat") 2 load("a(b.txt") f("x,  y")')
+        self.assertEqual(
+            tokens, ['load("my data.dat")', "2", 'load("a(b.txt")', 'f("x,  y")']
+        )
+        self.assertEqual(LarkExpression('"my data.dat"').evaluate(), "my data.dat")
+
     def test_keyword(self):
 
         # Basic keyword
         kw = MuSpinKeyword(["a b c", "d e f"])
 
-        self.assertTrue((kw.evaluate() == [["a", "b", "c"], ["d", "e", "f"]]).all())
+        self.assertTrue(
+            np.array_equal(kw.evaluate(), [["a", "b", "c"], ["d", "e", "f"]])
+        )
         self.assertEqual(len(kw), 2)
 
         # Test that the default works
@@ -89,11 +143,36 @@ class TestInput(unittest.TestCase):
         # Let's try a numerical one
         nkw = MuSpinEvaluateKeyword(["exp(0) 1+1 2^2"])
 
-        self.assertTrue((nkw.evaluate()[0] == [1, 2, 4]).all())
+        self.assertTrue(np.array_equal(nkw.evaluate()[0], [1, 2, 4]))
+
+        # Plain numbers, read without the parser
+        nkw = MuSpinEvaluateKeyword(["1 -2.5 .5e1", "3. 1-2 -1"])
+
+        self.assertTrue(np.array_equal(nkw.evaluate(), [[1, -2.5, 5], [3, -1, -1]]))
+
+        with self.assertRaises(LarkExpressionError):
+            MuSpinEvaluateKeyword(["1 nan"])
+
+        # With variables
+        vkw = MuSpinEvaluateKeyword(["x 2*x", "x+y 1"], variables=["x", "y"])
+
+        self.assertTrue(np.array_equal(vkw.evaluate(x=1, y=2), [[1, 2], [3, 1]]))
+
+        with self.assertRaises(LarkExpressionError):
+            vkw.evaluate(x=1)
+
+        with self.assertRaises(LarkExpressionError):
+            vkw.evaluate(x=1, y=2, z=3)
 
         exkw = MuSpinExpandKeyword(["range(0, 1)", "5.0 2.0"])
 
         self.assertTrue(len(exkw.evaluate()) == 101)
+        self.assertEqual(exkw.evaluate().dtype, object)
+
+        exkw = MuSpinExpandKeyword(["range(0, 1)", "5.0"])
+
+        self.assertEqual(exkw.evaluate().shape, (101, 1))
+        self.assertEqual(exkw.evaluate()[-1, 0], 5.0)
 
         # Test expansion of line in longer line
 
@@ -105,7 +184,7 @@ class TestInput(unittest.TestCase):
 
         rkw = RepeatKW(["repeat3(1)"])
 
-        self.assertTrue((rkw.evaluate()[0] == [1, 1, 1]).all())
+        self.assertTrue(np.array_equal(rkw.evaluate()[0], [1, 1, 1]))
 
         # Some failure cases
         with self.assertRaises(RuntimeError):
@@ -119,11 +198,11 @@ class TestInput(unittest.TestCase):
 
         skw = InputKeywords["spins"]()
 
-        self.assertTrue((skw.evaluate()[0] == ["mu", "e"]).all())
+        self.assertTrue(np.array_equal(skw.evaluate()[0], ["mu", "e"]))
 
         pkw = InputKeywords["polarization"]()
 
-        self.assertTrue((pkw.evaluate()[0] == [1, 0, 0]).all())
+        self.assertTrue(np.array_equal(pkw.evaluate()[0], [1, 0, 0]))
 
         fkw = InputKeywords["field"](["500*MHz"])
 
@@ -132,9 +211,7 @@ class TestInput(unittest.TestCase):
         # Test a range of fields
         fkw = InputKeywords["field"](["range(0, 20, 21)"])
 
-        self.assertTrue(
-            (np.array([b[0] for b in fkw.evaluate()]) == np.arange(21)).all()
-        )
+        self.assertTrue(np.array_equal(fkw.evaluate()[:, 0], np.arange(21)))
 
         tkw = InputKeywords["time"]()
 
@@ -152,10 +229,25 @@ class TestInput(unittest.TestCase):
 
         self.assertTrue(len(okw.evaluate()) >= 20)
 
+        okw = InputKeywords["orientation"](['zcw(20, "hemisphere")'])
+
+        self.assertTrue(len(okw.evaluate()) >= 20)
+        self.assertTrue(np.all(okw.evaluate()[:, 0] <= np.pi / 2))
+
         zkw = InputKeywords["zeeman"](["0 0 1"], args=["1"])
 
         self.assertEqual(zkw.id, "zeeman_1")
 
+        zkw = InputKeywords["zeeman"].get(["0 0 1"], args=["1"])
+
+        self.assertIs(InputKeywords["zeeman"].get(["0 0 1"], args=["1"]), zkw)
+        self.assertIsNot(InputKeywords["zeeman"].get(["0 0 2"], args=["1"]), zkw)
+
+        # Powder grids are not kept around
+        okw = InputKeywords["orientation"].get(["zcw(20)"])
+
+        self.assertIsNot(InputKeywords["orientation"].get(["zcw(20)"]), okw)
+
         dkw = InputKeywords["dipolar"](["0 0 1"], args=["1", "2"])
 
         self.assertEqual(dkw.id, "dipolar_1_2")
@@ -191,8 +283,20 @@ zeeman 1
         e1 = i1.evaluate()
 
         self.assertEqual(e1["name"].value[0], "test_1")
-        self.assertTrue((e1["spins"].value[0] == ["mu", "H"]).all())
-        self.assertTrue((e1["couplings"]["zeeman_1"].value[0] == [1, 0, 0]).all())
+        self.assertTrue(np.array_equal(e1["spins"].value[0], ["mu", "H"]))
+        self.assertTrue(np.array_equal(e1["couplings"]["zeeman_1"].value[0], [1, 0, 0]))
+
+        # Defaults are evaluated once and shared, so they can't be modified
+        e2 = i1.evaluate()
+        self.assertTrue(np.array_equal(e1["polarization"].value, [[1, 0, 0]]))
+        self.assertIs(e2["polarization"].value, e1["polarization"].value)
+        with self.assertRaises(ValueError):
+            e2["polarization"].value[0, 0] = 0
+
+        # Inputs can be sent to other processes
+        i2 = pickle.loads(pickle.dumps(i1))
+        e2 = i2.evaluate()
+        self.assertTrue(np.array_equal(e2["couplings"]["zeeman_1"].value[0], [1, 0, 0]))
 
     def test_fitting(self):
         # Test input focused around fitting
@@ -217,11 +321,11 @@ zeeman 1
         self.assertTrue(i1.fitting_info["fit"])
 
         data = i1.fitting_info["data"]
-        self.assertTrue((data == [[0, 0], [1, 1], [2, 4], [3, 9]]).all())
+        self.assertTrue(np.array_equal(data, [[0, 0], [1, 1], [2, 4], [3, 9]]))
 
         e1 = i1.evaluate(x=2.0)
         self.assertEqual(e1["field"].value[0][0], 4.0)
-        self.assertTrue((e1["couplings"]["zeeman_1"].value[0] == [2, 2, 0]).all())
+        self.assertTrue(np.array_equal(e1["couplings"]["zeeman_1"].value[0], [2, 2, 0]))
 
         variables = i1.variables
 
@@ -270,6 +374,50 @@ fitting_method
 
         data = finfo["data"]
         self.assertTrue(finfo["fit"])
-        self.assertTrue((data == tdata).all())
+        self.assertTrue(np.array_equal(data, tdata))
         self.assertEqual(finfo["method"], "nelder-mead")
         self.assertAlmostEqual(finfo["rtol"], 1e-3)
+
+        # Files are read again every time
+        tfile = NamedTemporaryFile(mode="w")
+        s4 = """
+fitting_variables
+    x
+fitting_data
+    load("{fname}")
+""".format(
+            fname=tfile.name
+        )
+
+        for d in tdata:
+            tfile.write("{0} {1}\n".format(*d))
+        tfile.flush()
+        data = MuSpinInput(StringIO(s4)).fitting_info["data"]
+        self.assertTrue(np.array_equal(data, tdata))
+
+        tfile.write("{0} {1}\n".format(2.0, 4.0))
+        tfile.flush()
+        data = MuSpinInput(StringIO(s4)).fitting_info["data"]
+        self.assertEqual(len(data), len(tdata) + 1)
+
+        tfile.close()
+
+        # File names with spaces and parentheses
+        tfile = NamedTemporaryFile(mode="w", prefix="my data(")
+        for d in tdata:
+            tfile.write("{0} {1}\n".format(*d))
+        tfile.flush()
+
+        s5 = """
+fitting_variables
+    x
+fitting_data
+    load("{fname}")
+""".format(
+            fname=tfile.name
+        )
+
+        data = MuSpinInput(StringIO(s5)).fitting_info["data"]
+        self.assertTrue(np.array_equal(data, tdata))
+
+        tfile.close()
@@ -22,6 +22,10 @@ class TestSpinOperator(unittest.TestCase):
         with self.assertRaises(ValueError):
             SpinOperator(data, dim=(2, 3))  # Incompatible dimensions
 
+        # Matrix can't be modified from outside
+        with self.assertRaises(ValueError):
+            s.matrix[0, 0] = 2.0
+
     def test_clone(self):
 
         s = SpinOperator.from_axes()
@@ -107,6 +111,9 @@ class TestSpinOperator(unittest.TestCase):
 
         Sx = SpinOperator.from_axes()
         Ix = SpinOperator.from_axes(1.0, "x")
+        Iz = SpinOperator.from_axes(1.0, "z")
+        Sy = SpinOperator.from_axes(0.5, "y")
+        Sz = SpinOperator.from_axes(0.5, "z")
         SxIx = SpinOperator.from_axes([0.5, 1.0], "xx")
         SxSx = SpinOperator.from_axes([0.5, 0.5], "xx")
         SySy = SpinOperator.from_axes([0.5, 0.5], "yy")
@@ -118,6 +125,22 @@ class TestSpinOperator(unittest.TestCase):
 
         self.assertTrue(np.all((16 * SxSx * SySy).matrix == np.diag([-1, 1, 1, -1])))
 
+        # Longer products
+        SxIzSySz = SpinOperator.from_axes([0.5, 1.0, 0.5, 0.5], "xzyz")
+        M = np.kron(np.kron(np.kron(Sx.matrix, Iz.matrix), Sy.matrix), Sz.matrix)
+        self.assertEqual(SxIzSySz.dimension, (2, 3, 2, 2))
+        self.assertTrue(np.all(np.isclose(SxIzSySz.matrix, M)))
+
+        # Large enough to be built through sparse products
+        SzIx8 = SpinOperator.from_axes([0.5] * 9 + [1.0], "z" + "0" * 8 + "x")
+        M = np.kron(np.kron(Sz.matrix, np.eye(2 ** 8)), Ix.matrix)
+        self.assertEqual(SzIx8.dimension, (2,) * 9 + (3,))
+        self.assertTrue(np.all(np.isclose(SzIx8.matrix, M)))
+
+        # Including a single large spin
+        Sz = SpinOperator.from_axes(599.5, "z")
+        self.assertTrue(np.all(Sz.matrix == np.diag(np.arange(599.5, -600, -1))))
+
     def test_density(self):
 
         rho = DensityOperator(np.eye(6) / 6.0, (2, 3))
@@ -126,6 +149,20 @@ class TestSpinOperator(unittest.TestCase):
         self.assertEqual(rhosmall.dimension, (2,))
         self.assertTrue(np.all(np.isclose(rhosmall.matrix, np.eye(2) / 2)))
 
+        # Product of three spins
+        rho1 = DensityOperator.from_vectors(0.5, [1, 0, 0])
+        rho2 = DensityOperator(np.diag([0.5, 0.3, 0.2]))
+        rho3 = DensityOperator.from_vectors(0.5, [0, 1, 0], 0.5)
+        rho = rho1.kron(rho2).kron(rho3)
+
+        rhosmall = rho.partial_trace([1])
+        self.assertEqual(rhosmall.dimension, (2, 2))
+        self.assertTrue(np.all(np.isclose(rhosmall.matrix, rho1.kron(rho3).matrix)))
+
+        rhosmall = rho.partial_trace([0, 2])
+        self.assertEqual(rhosmall.dimension, (3,))
+        self.assertTrue(np.all(np.isclose(rhosmall.matrix, rho2.matrix)))
+
         with self.assertRaises(ValueError):
             DensityOperator(np.array([[0, 1], [1, 0]]))
 
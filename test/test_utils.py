@@ -75,6 +75,13 @@ class TestUtils(unittest.TestCase):
         f = 3.0 * np.cos(orients[:, 0]) ** 2 - 1.0
         self.assertAlmostEqual(np.average(f), 0.0, 5)
 
+        # Reduced by inversion symmetry (converges more slowly)
+        orients = zcw_gen(N, "hemisphere")
+
+        self.assertTrue(np.all(orients[:, 0] <= np.pi / 2))
+        f = 3.0 * np.cos(orients[:, 0]) ** 2 - 1.0
+        self.assertAlmostEqual(np.average(f), 0.0, 2)
+
     def test_eulrange(self):
 
         N = 10